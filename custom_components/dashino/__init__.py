@@ -11,7 +11,7 @@ import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.exceptions import HomeAssistantError
+from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
@@ -27,6 +27,9 @@ from .const import (
     ATTR_ATTRIBUTE,
     ATTR_AS_NUMBER,
     ATTR_ROUND,
+    ATTR_MATCH,
+    ATTR_DOMAIN,
+    ATTR_AREA,
     ATTR_SOURCE,
     ATTR_TYPE,
     ATTR_WIDGET_ID,
@@ -43,12 +46,84 @@ from .const import (
     DEFAULT_TIMEOUT,
     DOMAIN,
 )
-from .http_client import DashinoClient, DashinoRequestError
+from .groups import DashinoGroupBinding, DashinoGroupManager
+from .http_client import DashinoClient, DashinoRequestError, async_get_capabilities
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = []
 
+SERVICES = (
+    "forward",
+    "set_state",
+    "set_state_field",
+    "clear_state",
+    "bind_group",
+    "unbind_group",
+)
+
+SERVICE_SCHEMA_FORWARD = vol.Schema(
+    {
+        vol.Optional(ATTR_SOURCE): cv.string,
+        vol.Optional(ATTR_WIDGET_ID): cv.string,
+        vol.Optional(ATTR_TYPE): cv.string,
+        vol.Optional(ATTR_DATA): vol.Any(dict, list, str, int, float, bool, None),
+        vol.Optional(ATTR_RAW): vol.Any(dict, list, str, int, float, bool, None),
+    }
+)
+
+SERVICE_SCHEMA_SET_STATE = vol.Schema(
+    {
+        vol.Optional(ATTR_KEY): cv.string,
+        vol.Optional(ATTR_DATA): vol.Any(dict, list, str, int, float, bool, None),
+        vol.Optional(ATTR_MERGE): cv.boolean,
+        vol.Optional(ATTR_REPLACE): cv.boolean,
+        vol.Optional(ATTR_SOURCE): cv.string,
+        vol.Optional(ATTR_RAW): vol.Any(dict, list, str, int, float, bool, None),
+    }
+)
+
+SERVICE_SCHEMA_SET_STATE_FIELD = vol.Schema(
+    {
+        vol.Optional(ATTR_KEY): cv.string,
+        vol.Required(ATTR_FIELD): cv.string,
+        vol.Required(ATTR_ENTITY_ID): cv.entity_id,
+        vol.Optional(ATTR_ATTRIBUTE): cv.string,
+        vol.Optional(ATTR_MERGE): cv.boolean,
+        vol.Optional(ATTR_SOURCE): cv.string,
+        vol.Optional(ATTR_AS_NUMBER): cv.boolean,
+        vol.Optional(ATTR_ROUND): vol.Coerce(int),
+        vol.Optional(ATTR_MAP): dict,
+    }
+)
+
+SERVICE_SCHEMA_CLEAR_STATE = vol.Schema(
+    {
+        vol.Optional(ATTR_KEY): cv.string,
+        vol.Optional(ATTR_SOURCE): cv.string,
+    }
+)
+
+SERVICE_SCHEMA_BIND_GROUP = vol.All(
+    vol.Schema(
+        {
+            vol.Required(ATTR_KEY): cv.string,
+            vol.Optional(ATTR_MATCH): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(ATTR_DOMAIN): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(ATTR_AREA): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(ATTR_ATTRIBUTE): cv.string,
+            vol.Optional(ATTR_SOURCE): cv.string,
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_MATCH, ATTR_DOMAIN, ATTR_AREA),
+)
+
+SERVICE_SCHEMA_UNBIND_GROUP = vol.Schema(
+    {
+        vol.Required(ATTR_KEY): cv.string,
+    }
+)
+
 
 async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Migrate old entry data to the latest version."""
@@ -65,80 +140,67 @@ async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up Dashino from a config entry."""
-
-    hass.data.setdefault(DOMAIN, {})
+def _client_config(entry: ConfigEntry) -> dict[str, Any]:
+    """Build DashinoClient settings from entry options, falling back to data."""
 
     def _get(key: str) -> str | None:
         return entry.options.get(key, entry.data.get(key))
 
-    base_url: str = _get(CONF_BASE_URL) or ""
-    default_source: str = _get(CONF_DEFAULT_SOURCE) or DEFAULT_SOURCE_VALUE
-    default_state_key: str | None = _get(CONF_DEFAULT_STATE_KEY) or None
-    secret_value = _get(CONF_SECRET)
-    secret: str | None = secret_value or None
-    secret_header: str = _get(CONF_SECRET_HEADER) or DEFAULT_SECRET_HEADER
-    api_token: str | None = _get(CONF_API_TOKEN) or None
-    default_widget_id: str | None = _get(CONF_DEFAULT_WIDGET_ID) or None
-    default_type: str | None = _get(CONF_DEFAULT_TYPE) or None
+    return {
+        "base_url": _get(CONF_BASE_URL) or "",
+        "default_source": _get(CONF_DEFAULT_SOURCE) or DEFAULT_SOURCE_VALUE,
+        "default_state_key": _get(CONF_DEFAULT_STATE_KEY) or None,
+        "secret": _get(CONF_SECRET) or None,
+        "secret_header": _get(CONF_SECRET_HEADER) or DEFAULT_SECRET_HEADER,
+        "api_token": _get(CONF_API_TOKEN) or None,
+        "default_widget_id": _get(CONF_DEFAULT_WIDGET_ID) or None,
+        "default_type": _get(CONF_DEFAULT_TYPE) or None,
+    }
+
+
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply option changes to the live client instead of reloading the entry."""
+
+    stored = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if stored is None:
+        return
+    client: DashinoClient = stored["client"]
+    await client.async_update_config(**_client_config(entry))
+    try:
+        await async_get_capabilities(hass, client, concurrent=False)
+    except HomeAssistantError as err:
+        _LOGGER.warning("Dashino capability probe after option change failed: %s", err)
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up Dashino from a config entry."""
+
+    hass.data.setdefault(DOMAIN, {})
 
     client = DashinoClient(
-        base_url=base_url,
-        default_source=default_source,
-        secret=secret,
-        secret_header=secret_header,
-        api_token=api_token,
+        **_client_config(entry),
         session=async_get_clientsession(hass),
         timeout=DEFAULT_TIMEOUT,
     )
 
-    service_schema_forward = vol.Schema(
-        {
-            vol.Optional(ATTR_SOURCE): cv.string,
-            vol.Optional(ATTR_WIDGET_ID): cv.string,
-            vol.Optional(ATTR_TYPE): cv.string,
-            vol.Optional(ATTR_DATA): vol.Any(dict, list, str, int, float, bool, None),
-            vol.Optional(ATTR_RAW): vol.Any(dict, list, str, int, float, bool, None),
-        }
-    )
+    # Cached after a config/options flow or earlier setup; otherwise a health
+    # check (the state API test key is only written when health is missing),
+    # and Home Assistant retries setup in the background on failure.
+    try:
+        await async_get_capabilities(hass, client, concurrent=False)
+    except HomeAssistantError as err:
+        raise ConfigEntryNotReady(f"Dashino not reachable at {client.base_url}: {err}") from err
 
-    service_schema_set_state = vol.Schema(
-        {
-            vol.Optional(ATTR_KEY): cv.string,
-            vol.Optional(ATTR_DATA): vol.Any(dict, list, str, int, float, bool, None),
-            vol.Optional(ATTR_MERGE): cv.boolean,
-            vol.Optional(ATTR_REPLACE): cv.boolean,
-            vol.Optional(ATTR_SOURCE): cv.string,
-            vol.Optional(ATTR_RAW): vol.Any(dict, list, str, int, float, bool, None),
-        }
-    )
-
-    service_schema_set_state_field = vol.Schema(
-        {
-            vol.Optional(ATTR_KEY): cv.string,
-            vol.Required(ATTR_FIELD): cv.string,
-            vol.Required(ATTR_ENTITY_ID): cv.entity_id,
-            vol.Optional(ATTR_ATTRIBUTE): cv.string,
-            vol.Optional(ATTR_MERGE): cv.boolean,
-            vol.Optional(ATTR_SOURCE): cv.string,
-            vol.Optional(ATTR_AS_NUMBER): cv.boolean,
-            vol.Optional(ATTR_ROUND): vol.Coerce(int),
-            vol.Optional(ATTR_MAP): dict,
-        }
-    )
+    entry.async_on_unload(client.shutdown)
 
-    service_schema_clear_state = vol.Schema(
-        {
-            vol.Optional(ATTR_KEY): cv.string,
-            vol.Optional(ATTR_SOURCE): cv.string,
-        }
-    )
+    groups = DashinoGroupManager(hass, client)
+    entry.async_on_unload(groups.async_shutdown)
+    await groups.async_setup()
 
     async def forward_service(call: ServiceCall) -> None:
         """Forward the payload to Dashino (legacy)."""
 
-        source = call.data.get(ATTR_SOURCE) or default_source
+        source = call.data.get(ATTR_SOURCE) or client.default_source
         if not source:
             raise HomeAssistantError("Dashino source is required")
 
@@ -147,8 +209,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             body = call.data[ATTR_RAW]
         else:
             body = {}
-            widget_id = call.data.get(ATTR_WIDGET_ID) or default_widget_id
-            msg_type = call.data.get(ATTR_TYPE) or default_type
+            widget_id = call.data.get(ATTR_WIDGET_ID) or client.default_widget_id
+            msg_type = call.data.get(ATTR_TYPE) or client.default_type
             data = call.data.get(ATTR_DATA)
 
             if widget_id is not None:
@@ -175,11 +237,11 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     async def set_state_service(call: ServiceCall) -> None:
         """Set or merge a Dashino state."""
 
-        key = call.data.get(ATTR_KEY) or default_state_key
+        key = call.data.get(ATTR_KEY) or client.default_state_key
         if not key:
             raise HomeAssistantError("Dashino state key is required")
 
-        source_value = call.data.get(ATTR_SOURCE) or default_source or DEFAULT_SOURCE_VALUE
+        source_value = call.data.get(ATTR_SOURCE) or client.default_source or DEFAULT_SOURCE_VALUE
         raw = call.data.get(ATTR_RAW)
 
         if raw is not None:
@@ -212,7 +274,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     async def set_state_field_service(call: ServiceCall) -> None:
         """Set a single field in a Dashino state from an entity value."""
 
-        key = call.data.get(ATTR_KEY) or default_state_key
+        key = call.data.get(ATTR_KEY) or client.default_state_key
         if not key:
             raise HomeAssistantError("Dashino state key is required")
 
@@ -256,7 +318,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
         merge_value = call.data.get(ATTR_MERGE)
         merge = True if merge_value is None else bool(merge_value)
-        source_value = call.data.get(ATTR_SOURCE) or default_source or DEFAULT_SOURCE_VALUE
+        source_value = call.data.get(ATTR_SOURCE) or client.default_source or DEFAULT_SOURCE_VALUE
 
         body = {"data": {field_name: value}, "merge": merge, "source": source_value}
 
@@ -274,7 +336,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     async def clear_state_service(call: ServiceCall) -> None:
         """Clear a Dashino state."""
 
-        key = call.data.get(ATTR_KEY) or default_state_key
+        key = call.data.get(ATTR_KEY) or client.default_state_key
         if not key:
             raise HomeAssistantError("Dashino state key is required")
 
@@ -289,39 +351,68 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             _LOGGER.exception("Dashino clear_state failed: %s", err)
             raise HomeAssistantError("Dashino clear_state failed") from err
 
+    async def bind_group_service(call: ServiceCall) -> None:
+        """Publish a selector-defined group of entities as one Dashino state."""
+
+        await groups.async_bind(DashinoGroupBinding.from_dict(dict(call.data)))
+
+    async def unbind_group_service(call: ServiceCall) -> None:
+        """Stop publishing a group snapshot."""
+
+        key = call.data[ATTR_KEY]
+        if not await groups.async_unbind(key):
+            raise HomeAssistantError(f"Dashino group '{key}' is not bound")
+
     hass.services.async_register(
         DOMAIN,
         "forward",
         forward_service,
-        schema=service_schema_forward,
+        schema=SERVICE_SCHEMA_FORWARD,
     )
 
     hass.services.async_register(
         DOMAIN,
         "set_state",
         set_state_service,
-        schema=service_schema_set_state,
+        schema=SERVICE_SCHEMA_SET_STATE,
     )
 
     hass.services.async_register(
         DOMAIN,
         "set_state_field",
         set_state_field_service,
-        schema=service_schema_set_state_field,
+        schema=SERVICE_SCHEMA_SET_STATE_FIELD,
     )
 
     hass.services.async_register(
         DOMAIN,
         "clear_state",
         clear_state_service,
-        schema=service_schema_clear_state,
+        schema=SERVICE_SCHEMA_CLEAR_STATE,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        "bind_group",
+        bind_group_service,
+        schema=SERVICE_SCHEMA_BIND_GROUP,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        "unbind_group",
+        unbind_group_service,
+        schema=SERVICE_SCHEMA_UNBIND_GROUP,
     )
 
     hass.data[DOMAIN][entry.entry_id] = {
         "client": client,
+        "groups": groups,
         "service_registered": True,
     }
 
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
 
@@ -330,7 +421,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload Dashino config entry."""
 
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
-    for service in ("forward", "set_state", "set_state_field", "clear_state"):
+    for service in SERVICES:
         if hass.services.has_service(DOMAIN, service):
             hass.services.async_remove(DOMAIN, service)
 
@@ -12,6 +12,8 @@ from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .const import (
+    CAPABILITY_HEALTH,
+    CAPABILITY_STATE_API,
     CONF_API_TOKEN,
     CONF_BASE_URL,
     CONF_DEFAULT_SOURCE,
@@ -24,7 +26,7 @@ from .const import (
     DEFAULT_SOURCE_VALUE,
     DOMAIN,
 )
-from .http_client import DashinoClient, DashinoRequestError
+from .http_client import DashinoClient, async_get_capabilities
 
 
 def _normalize_base_url(url: str) -> str:
@@ -94,27 +96,13 @@ async def _validate_and_normalize(
         api_token=api_token or None,
     )
 
-    health_missing = False
     try:
-        await client.check_health()
-    except DashinoRequestError as err:
-        if err.status == 404:
-            health_missing = True
-        else:
-            errors["base"] = "cannot_connect"
+        capabilities = await async_get_capabilities(hass, client, source=default_source)
     except Exception:  # noqa: BLE001
         errors["base"] = "cannot_connect"
-
-    if not errors and health_missing:
-        try:
-            await client.check_state_api(source=default_source)
-        except DashinoRequestError as err:
-            if err.status == 404:
-                errors["base"] = "state_api_missing"
-            else:
-                errors["base"] = "cannot_connect"
-        except Exception:  # noqa: BLE001
-            errors["base"] = "cannot_connect"
+    else:
+        if not capabilities[CAPABILITY_HEALTH] and capabilities[CAPABILITY_STATE_API] is False:
+            errors["base"] = "state_api_missing"
 
     normalized = {
         CONF_BASE_URL: base_url,
@@ -30,3 +30,22 @@ ATTR_ATTRIBUTE = "attribute"
 ATTR_AS_NUMBER = "as_number"
 ATTR_ROUND = "round"
 ATTR_MAP = "map"
+ATTR_MATCH = "match"
+ATTR_DOMAIN = "domain"
+ATTR_AREA = "area"
+
+GROUP_STORAGE_KEY = f"{DOMAIN}.groups"
+GROUP_STORAGE_VERSION = 1
+GROUP_FLUSH_DELAY = 0.5
+GROUP_RETRY_DELAY = 5
+GROUP_RETRY_MAX_DELAY = 300
+
+WEBHOOK_BATCH_WINDOW = 0.05
+WEBHOOK_BATCH_MAX = 100
+
+PROBE_TIMEOUT = 3
+
+DATA_CAPABILITIES = f"{DOMAIN}_capabilities"
+CAPABILITY_HEALTH = "health"
+CAPABILITY_STATE_API = "state_api"
+CAPABILITY_NDJSON_WEBHOOKS = "ndjson_webhooks"
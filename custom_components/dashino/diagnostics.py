@@ -35,6 +35,7 @@ async def async_get_config_entry_diagnostics(
     stored = hass.data.get(DOMAIN, {}).get(entry.entry_id, {})
     client = stored.get("client")
     last_error = getattr(client, "last_error", None)
+    groups = stored.get("groups")
 
     conf = entry.options or entry.data
 
@@ -52,4 +53,7 @@ async def async_get_config_entry_diagnostics(
         "state": {
             "last_error": last_error,
         },
+        "runtime": {
+            "groups": groups.async_stats() if groups is not None else None,
+        },
     }
@@ -0,0 +1,413 @@
+"""Entity group snapshots for Dashino."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+import logging
+from typing import Any
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.json import json_dumps
+from homeassistant.helpers.storage import Store
+from homeassistant.util.json import json_loads
+
+from .const import (
+    ATTR_AREA,
+    ATTR_ATTRIBUTE,
+    ATTR_DOMAIN,
+    ATTR_KEY,
+    ATTR_MATCH,
+    ATTR_SOURCE,
+    GROUP_FLUSH_DELAY,
+    GROUP_RETRY_DELAY,
+    GROUP_RETRY_MAX_DELAY,
+    GROUP_STORAGE_KEY,
+    GROUP_STORAGE_VERSION,
+)
+from .http_client import DashinoClient
+
+_LOGGER = logging.getLogger(__name__)
+
+_REINDEX_CHANGES = {"area_id", "device_id", "entity_id"}
+
+
+@dataclass(frozen=True)
+class DashinoGroupBinding:
+    """Selectors mapping a set of entities onto one Dashino state key."""
+
+    key: str
+    match: tuple[str, ...] = ()
+    domain: tuple[str, ...] = ()
+    area: tuple[str, ...] = ()
+    attribute: str | None = None
+    source: str | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> DashinoGroupBinding:
+        return cls(
+            key=data[ATTR_KEY],
+            match=tuple(data.get(ATTR_MATCH) or ()),
+            domain=tuple(data.get(ATTR_DOMAIN) or ()),
+            area=tuple(data.get(ATTR_AREA) or ()),
+            attribute=data.get(ATTR_ATTRIBUTE) or None,
+            source=data.get(ATTR_SOURCE) or None,
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            ATTR_KEY: self.key,
+            ATTR_MATCH: list(self.match),
+            ATTR_DOMAIN: list(self.domain),
+            ATTR_AREA: list(self.area),
+            ATTR_ATTRIBUTE: self.attribute,
+            ATTR_SOURCE: self.source,
+        }
+
+    def matches(self, entity_id: str, area_id: str | None) -> bool:
+        """Return True when every configured selector accepts the entity."""
+
+        if self.domain and entity_id.split(".", 1)[0] not in self.domain:
+            return False
+        if self.match and not any(fnmatchcase(entity_id, pattern) for pattern in self.match):
+            return False
+        if self.area and area_id not in self.area:
+            return False
+        return True
+
+    def value(self, state: State) -> Any:
+        if self.attribute:
+            return _json_safe(state.attributes.get(self.attribute))
+        return state.state
+
+
+def _json_safe(value: Any) -> Any:
+    """Return value in plain JSON types so every later push can serialize it."""
+
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    try:
+        return json_loads(json_dumps(value))
+    except (TypeError, ValueError):
+        return str(value)
+
+
+class DashinoGroupManager:
+    """Keep group snapshots in sync with the state machine.
+
+    An index from entity_id to the set of group keys it belongs to is built
+    once and then patched from registry events, so a state change only touches
+    the groups that contain the changed entity.
+    """
+
+    def __init__(self, hass: HomeAssistant, client: DashinoClient) -> None:
+        self.hass = hass
+        self.client = client
+        self._store: Store[dict[str, Any]] = Store(hass, GROUP_STORAGE_VERSION, GROUP_STORAGE_KEY)
+        self._bindings: dict[str, DashinoGroupBinding] = {}
+        self._index: dict[str, set[str]] = {}
+        self._snapshots: dict[str, dict[str, Any]] = {}
+        self._pending: dict[str, dict[str, Any]] = {}
+        self._replace: set[str] = set()
+        self._stale: set[str] = set()
+        self._unsubs: list[CALLBACK_TYPE] = []
+        self._flush_unsub: CALLBACK_TYPE | None = None
+        self._flush_task: asyncio.Task | None = None
+        self._retry_delay: float = GROUP_RETRY_DELAY
+
+    @property
+    def bindings(self) -> dict[str, DashinoGroupBinding]:
+        return self._bindings
+
+    async def async_setup(self) -> None:
+        """Load stored bindings, build the index and start listening."""
+
+        stored = await self._store.async_load() or {}
+        for item in stored.get("groups", []):
+            binding = DashinoGroupBinding.from_dict(item)
+            self._bindings[binding.key] = binding
+            self._snapshots[binding.key] = {}
+
+        if self._bindings:
+            for state in self.hass.states.async_all():
+                self._index_entity(state)
+            self._replace.update(self._bindings)
+            self._schedule_flush()
+
+        self._unsubs.append(
+            self.hass.bus.async_listen(EVENT_STATE_CHANGED, self._handle_state_changed)
+        )
+        self._unsubs.append(
+            self.hass.bus.async_listen(
+                er.EVENT_ENTITY_REGISTRY_UPDATED, self._handle_entity_registry_updated
+            )
+        )
+        self._unsubs.append(
+            self.hass.bus.async_listen(
+                dr.EVENT_DEVICE_REGISTRY_UPDATED, self._handle_device_registry_updated
+            )
+        )
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop listening and cancel any pending push."""
+
+        while self._unsubs:
+            self._unsubs.pop()()
+        if self._flush_unsub is not None:
+            self._flush_unsub()
+            self._flush_unsub = None
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._flush_task = None
+        self._index.clear()
+        self._snapshots.clear()
+        self._pending.clear()
+        self._replace.clear()
+        self._stale.clear()
+
+    @callback
+    def async_stats(self) -> dict[str, int]:
+        """Return structure sizes, used by diagnostics to spot unbounded growth."""
+
+        return {
+            "bindings": len(self._bindings),
+            "indexed_entities": len(self._index),
+            "snapshot_members": sum(len(snapshot) for snapshot in self._snapshots.values()),
+            "pending_keys": len(self._pending),
+            "stale_keys": len(self._stale),
+            "listeners": len(self._unsubs),
+            "flush_running": int(self._flush_task is not None and not self._flush_task.done()),
+        }
+
+    async def async_bind(self, binding: DashinoGroupBinding) -> None:
+        """Add or replace a group binding and push its first snapshot."""
+
+        if binding.key in self._bindings:
+            self._drop_binding(binding.key)
+
+        self._bindings[binding.key] = binding
+        self._snapshots[binding.key] = {}
+        for state in self.hass.states.async_all():
+            entity_id = state.entity_id
+            if entity_id not in self._index:
+                self._index_entity(state)
+            elif binding.matches(entity_id, self._area_id(entity_id) if binding.area else None):
+                self._index[entity_id].add(binding.key)
+                self._snapshots[binding.key][entity_id] = binding.value(state)
+
+        self._replace.add(binding.key)
+        self._schedule_flush()
+        await self._async_save()
+
+    async def async_unbind(self, key: str) -> bool:
+        """Remove a group binding; the Dashino state itself is left untouched."""
+
+        if key not in self._bindings:
+            return False
+        self._drop_binding(key)
+        await self._async_save()
+        return True
+
+    def _drop_binding(self, key: str) -> None:
+        for entity_id in self._snapshots.pop(key, {}):
+            if (keys := self._index.get(entity_id)) is not None:
+                keys.discard(key)
+        self._bindings.pop(key, None)
+        self._pending.pop(key, None)
+        self._replace.discard(key)
+        self._stale.discard(key)
+
+    async def _async_save(self) -> None:
+        await self._store.async_save(
+            {"groups": [binding.as_dict() for binding in self._bindings.values()]}
+        )
+
+    def _area_id(self, entity_id: str) -> str | None:
+        entry = er.async_get(self.hass).async_get(entity_id)
+        if entry is None:
+            return None
+        if entry.area_id:
+            return entry.area_id
+        if entry.device_id:
+            device = dr.async_get(self.hass).async_get(entry.device_id)
+            if device is not None:
+                return device.area_id
+        return None
+
+    def _keys_for(self, entity_id: str) -> set[str]:
+        if not self._bindings:
+            return set()
+        area_id = None
+        if any(binding.area for binding in self._bindings.values()):
+            area_id = self._area_id(entity_id)
+        return {
+            key
+            for key, binding in self._bindings.items()
+            if binding.matches(entity_id, area_id)
+        }
+
+    def _index_entity(self, state: State) -> set[str]:
+        """Evaluate selectors for an entity and record it in the index."""
+
+        keys = self._keys_for(state.entity_id)
+        self._index[state.entity_id] = keys
+        for key in keys:
+            self._snapshots[key][state.entity_id] = self._bindings[key].value(state)
+        return keys
+
+    @callback
+    def _remove_entity(self, entity_id: str) -> None:
+        for key in self._index.pop(entity_id, ()):
+            self._snapshots[key].pop(entity_id, None)
+            self._pending.get(key, {}).pop(entity_id, None)
+            self._replace.add(key)
+        self._schedule_flush()
+
+    @callback
+    def _reindex_entity(self, entity_id: str) -> None:
+        state = self.hass.states.get(entity_id)
+        if state is None:
+            if entity_id in self._index:
+                self._remove_entity(entity_id)
+            return
+
+        old_keys = self._index.get(entity_id, set())
+        new_keys = self._keys_for(entity_id)
+        if new_keys == old_keys:
+            return
+
+        self._index[entity_id] = new_keys
+        for key in old_keys - new_keys:
+            self._snapshots[key].pop(entity_id, None)
+            self._pending.get(key, {}).pop(entity_id, None)
+            self._replace.add(key)
+        for key in new_keys - old_keys:
+            value = self._bindings[key].value(state)
+            self._snapshots[key][entity_id] = value
+            self._pending.setdefault(key, {})[entity_id] = value
+        self._schedule_flush()
+
+    @callback
+    def _handle_state_changed(self, event: Event) -> None:
+        if not self._bindings:
+            return
+
+        entity_id: str = event.data["entity_id"]
+        new_state: State | None = event.data.get("new_state")
+        if new_state is None:
+            if entity_id in self._index:
+                self._remove_entity(entity_id)
+            return
+
+        keys = self._index.get(entity_id)
+        if keys is None:
+            keys = self._keys_for(entity_id)
+            self._index[entity_id] = keys
+
+        changed = False
+        for key in keys:
+            value = self._bindings[key].value(new_state)
+            snapshot = self._snapshots[key]
+            if entity_id in snapshot and snapshot[entity_id] == value:
+                continue
+            snapshot[entity_id] = value
+            self._pending.setdefault(key, {})[entity_id] = value
+            changed = True
+
+        if changed:
+            self._schedule_flush()
+
+    @callback
+    def _handle_entity_registry_updated(self, event: Event) -> None:
+        if not self._bindings:
+            return
+
+        data = event.data
+        if data["action"] == "update":
+            if not _REINDEX_CHANGES & set(data.get("changes", {})):
+                return
+            if old_entity_id := data.get("old_entity_id"):
+                self._reindex_entity(old_entity_id)
+        self._reindex_entity(data["entity_id"])
+
+    @callback
+    def _handle_device_registry_updated(self, event: Event) -> None:
+        data = event.data
+        if data["action"] != "update" or "area_id" not in data.get("changes", {}):
+            return
+        if not any(binding.area for binding in self._bindings.values()):
+            return
+
+        for entry in er.async_entries_for_device(er.async_get(self.hass), data["device_id"]):
+            if entry.area_id is None:
+                self._reindex_entity(entry.entity_id)
+
+    @callback
+    def _schedule_flush(self) -> None:
+        if self._flush_unsub is not None:
+            return
+        if self._stale:
+            # A push failed: retry with backoff, carrying any newer changes along.
+            delay = self._retry_delay
+            self._retry_delay = min(self._retry_delay * 2, GROUP_RETRY_MAX_DELAY)
+        elif self._pending or self._replace:
+            delay = GROUP_FLUSH_DELAY
+        else:
+            return
+        self._flush_unsub = async_call_later(self.hass, delay, self._start_flush)
+
+    @callback
+    def _start_flush(self, _now: Any) -> None:
+        self._flush_unsub = None
+        if self._flush_task is not None and not self._flush_task.done():
+            # A push is still running; it reschedules itself when it finishes.
+            return
+        self._flush_task = self.hass.async_create_background_task(
+            self._async_flush(), "dashino group flush"
+        )
+
+    async def _async_flush(self) -> None:
+        """Push full snapshots for reshaped groups and merge deltas for the rest."""
+
+        replace, self._replace = self._replace | self._stale, set()
+        self._stale = set()
+        pending, self._pending = self._pending, {}
+
+        for key in replace:
+            if key not in self._bindings:
+                continue
+            pending.pop(key, None)
+            body = {
+                "data": dict(self._snapshots[key]),
+                "merge": False,
+                "source": self._bindings[key].source or self.client.default_source,
+            }
+            await self._async_push(key, body)
+
+        for key, delta in pending.items():
+            if key not in self._bindings or not delta:
+                continue
+            body = {
+                "data": delta,
+                "merge": True,
+                "source": self._bindings[key].source or self.client.default_source,
+            }
+            await self._async_push(key, body)
+
+        if not self._stale:
+            self._retry_delay = GROUP_RETRY_DELAY
+        self._schedule_flush()
+
+    async def _async_push(self, key: str, body: dict[str, Any]) -> None:
+        try:
+            await self.client.set_state_value(key, body)
+        except HomeAssistantError as err:
+            _LOGGER.warning("Dashino group %s push failed: %s", key, err)
+            # Resend the whole snapshot on retry so the server cannot drift.
+            self._stale.add(key)
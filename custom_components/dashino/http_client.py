@@ -2,16 +2,35 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any
 
 from aiohttp import ClientSession, ClientTimeout
+from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.json import json_dumps
 
-from .const import DEFAULT_SECRET_HEADER, DEFAULT_TIMEOUT
+from .const import (
+    CAPABILITY_HEALTH,
+    CAPABILITY_NDJSON_WEBHOOKS,
+    CAPABILITY_STATE_API,
+    DATA_CAPABILITIES,
+    DEFAULT_SECRET_HEADER,
+    DEFAULT_TIMEOUT,
+    PROBE_TIMEOUT,
+    WEBHOOK_BATCH_MAX,
+    WEBHOOK_BATCH_WINDOW,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+NDJSON_FEATURE = "webhooks-ndjson"
+
+# Statuses meaning the webhook endpoint refused the NDJSON body as a whole.
+_NDJSON_UNSUPPORTED = {405, 415}
+
 
 class DashinoRequestError(HomeAssistantError):
     """Raised when Dashino returns an error response."""
@@ -33,6 +52,9 @@ class DashinoClient:
         secret: str | None = None,
         secret_header: str | None = None,
         api_token: str | None = None,
+        default_state_key: str | None = None,
+        default_widget_id: str | None = None,
+        default_type: str | None = None,
         timeout: int = DEFAULT_TIMEOUT,
     ) -> None:
         self.base_url = base_url.rstrip("/")
@@ -41,41 +63,194 @@ class DashinoClient:
         self.secret = secret
         self.secret_header = secret_header or DEFAULT_SECRET_HEADER
         self.api_token = api_token
+        self.default_state_key = default_state_key
+        self.default_widget_id = default_widget_id
+        self.default_type = default_type
         self.timeout = timeout
         self.last_error: str | None = None
+        self._inflight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._ready = asyncio.Event()
+        self._ready.set()
+        self._reconfigure_lock = asyncio.Lock()
+        self._webhook_queues: dict[str, list[tuple[bytes, asyncio.Future[None]]]] = {}
+        self._webhook_senders: dict[str, asyncio.Task[None]] = {}
+        self.capabilities: dict[str, bool | None] = {}
+
+    async def async_update_config(
+        self,
+        *,
+        base_url: str,
+        default_source: str,
+        secret: str | None = None,
+        secret_header: str | None = None,
+        api_token: str | None = None,
+        default_state_key: str | None = None,
+        default_widget_id: str | None = None,
+        default_type: str | None = None,
+        timeout: int | None = None,
+    ) -> None:
+        """Swap settings on the live client without dropping the session.
+
+        Auth, defaults and timeouts apply to the next request. When the base
+        URL changes, new requests are held until requests already sent to the
+        old target have finished, so ordering across the switch is preserved.
+        """
+
+        base_url = base_url.rstrip("/")
+        async with self._reconfigure_lock:
+            if base_url != self.base_url and self._inflight:
+                self._ready.clear()
+                try:
+                    await asyncio.wait_for(self._idle.wait(), timeout=self.timeout)
+                except asyncio.TimeoutError:
+                    _LOGGER.warning(
+                        "Dashino requests to %s still pending after %ss; switching to %s",
+                        self.base_url,
+                        self.timeout,
+                        base_url,
+                    )
+
+            if base_url != self.base_url:
+                self.capabilities = {}
+            self.base_url = base_url
+            self.default_source = default_source
+            self.secret = secret
+            self.secret_header = secret_header or DEFAULT_SECRET_HEADER
+            self.api_token = api_token
+            self.default_state_key = default_state_key
+            self.default_widget_id = default_widget_id
+            self.default_type = default_type
+            if timeout is not None:
+                self.timeout = timeout
+            self._ready.set()
+
+    def shutdown(self) -> None:
+        """Cancel queued webhook batches; callers waiting on them are cancelled."""
+
+        for task in self._webhook_senders.values():
+            task.cancel()
+        self._webhook_senders.clear()
+        for queue in self._webhook_queues.values():
+            for _, future in queue:
+                future.cancel()
+        self._webhook_queues.clear()
 
-    def _headers(self) -> dict[str, str]:
-        headers = {"Content-Type": "application/json"}
+    def _headers(self, content_type: str = "application/json") -> dict[str, str]:
+        headers = {"Content-Type": content_type}
         if self.api_token:
             headers["Authorization"] = f"Bearer {self.api_token}"
         if self.secret:
             headers[self.secret_header] = self.secret
         return headers
 
-    def _webhook_url(self, source: str | None) -> str:
+    def _webhook_path(self, source: str | None) -> str:
         src = source or self.default_source
-        return f"{self.base_url}/api/webhooks/{src}"
+        return f"/api/webhooks/{src}"
 
-    def _state_url(self, key: str) -> str:
-        return f"{self.base_url}/api/states/{key}/value"
+    def _state_path(self, key: str) -> str:
+        return f"/api/states/{key}/value"
 
     async def forward_webhook(self, *, source: str | None, payload: Any) -> None:
-        """Send payload to Dashino webhook."""
+        """Send payload to Dashino webhook.
 
-        url = self._webhook_url(source)
-        await self._request("post", url, json=payload)
+        Events for the same source arriving within WEBHOOK_BATCH_WINDOW are
+        sent together, in call order, as one NDJSON body when the server
+        advertises support in /api/health; this returns once the event was sent.
+        """
+
+        src = source or self.default_source
+        body = _encode(payload)
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._webhook_queues.setdefault(src, []).append((body, future))
+        if src not in self._webhook_senders:
+            self._webhook_senders[src] = asyncio.create_task(
+                self._send_webhooks(src), name=f"dashino webhooks {src}"
+            )
+        await future
+
+    async def _send_webhooks(self, source: str) -> None:
+        """Drain the queue for one source, one batch at a time."""
+
+        batch: list[tuple[bytes, asyncio.Future[None]]] = []
+        try:
+            await asyncio.sleep(WEBHOOK_BATCH_WINDOW)
+            while queue := self._webhook_queues.get(source):
+                batch = queue[:WEBHOOK_BATCH_MAX]
+                del queue[:WEBHOOK_BATCH_MAX]
+                await self._send_webhook_batch(source, batch)
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        finally:
+            if self._webhook_senders.get(source) is asyncio.current_task():
+                del self._webhook_senders[source]
+            if not self._webhook_queues.get(source):
+                self._webhook_queues.pop(source, None)
+
+    async def _send_webhook_batch(
+        self, source: str, batch: list[tuple[bytes, asyncio.Future[None]]]
+    ) -> None:
+        path = self._webhook_path(source)
+
+        if len(batch) > 1 and self.capabilities.get(CAPABILITY_NDJSON_WEBHOOKS) is True:
+            batch = await self._send_ndjson(path, batch)
+            if not batch:
+                return
+            _LOGGER.debug("Dashino webhooks refused NDJSON; sending singly")
+            self.capabilities[CAPABILITY_NDJSON_WEBHOOKS] = False
+
+        # One request per event, in order, over the session's kept-alive connections.
+        for body, future in batch:
+            try:
+                await self._request("post", path, data=body)
+            except HomeAssistantError as err:
+                _resolve([(body, future)], err)
+            else:
+                _resolve([(body, future)])
+
+    async def _send_ndjson(
+        self, path: str, batch: list[tuple[bytes, asyncio.Future[None]]]
+    ) -> list[tuple[bytes, asyncio.Future[None]]]:
+        """Send batch as one NDJSON body and resolve its callers.
+
+        Splits the batch when the server answers 413. Returns the events not
+        yet sent because the server refused the NDJSON format itself; other
+        errors fail the batch without replaying it, since the server may have
+        applied some lines already.
+        """
+
+        body = b"".join(line + b"\n" for line, _ in batch)
+        try:
+            await self._request("post", path, data=body, content_type=NDJSON_CONTENT_TYPE)
+        except DashinoRequestError as err:
+            if err.status in _NDJSON_UNSUPPORTED:
+                return batch
+            if err.status == 413 and len(batch) > 1:
+                half = len(batch) // 2
+                if unsent := await self._send_ndjson(path, batch[:half]):
+                    return unsent + batch[half:]
+                return await self._send_ndjson(path, batch[half:])
+            _resolve(batch, err)
+        except HomeAssistantError as err:
+            _resolve(batch, err)
+        else:
+            _resolve(batch)
+        return []
 
     async def set_state_value(self, key: str, body: dict[str, Any]) -> dict[str, Any] | None:
         """Set or merge a Dashino state value."""
 
-        url = self._state_url(key)
-        return await self._request("post", url, json=body)
+        path = self._state_path(key)
+        return await self._request("post", path, json=body)
 
     async def clear_state_value(self, key: str) -> None:
         """Clear a Dashino state value."""
 
-        url = self._state_url(key)
-        await self._request("delete", url)
+        path = self._state_path(key)
+        await self._request("delete", path)
 
     async def test_connectivity(self, *, source: str | None = None) -> None:
         """Perform a connectivity test via webhook."""
@@ -83,35 +258,132 @@ class DashinoClient:
         test_payload = {"type": "dashino-test", "data": {"ok": True}}
         await self.forward_webhook(source=source, payload=test_payload)
 
-    async def check_health(self) -> None:
-        """Call Dashino health endpoint if available."""
+    async def check_health(self, *, timeout: int | None = None) -> Any:
+        """Call Dashino health endpoint if available and return its JSON body."""
 
-        url = f"{self.base_url}/api/health"
-        await self._request("get", url)
+        return await self._request("get", "/api/health", timeout=timeout)
 
-    async def check_state_api(self, *, test_key: str = "__ha_test", source: str = "homeassistant") -> None:
+    async def check_state_api(
+        self,
+        *,
+        test_key: str = "__ha_test",
+        source: str = "homeassistant",
+        timeout: int | None = None,
+    ) -> None:
         """Verify state API by writing and cleaning a test key."""
 
         body = {"data": {"ok": True}, "merge": False, "source": source}
-        await self.set_state_value(test_key, body)
+        await self._request("post", self._state_path(test_key), json=body, timeout=timeout)
         try:
-            await self.clear_state_value(test_key)
+            await self._request("delete", self._state_path(test_key), timeout=timeout)
         except DashinoRequestError as err:
             if err.status == 404:
                 return
             raise
 
-    async def _request(self, method: str, url: str, json: Any | None = None) -> Any:
-        timeout = ClientTimeout(total=self.timeout)
+    async def probe(
+        self,
+        *,
+        source: str = "homeassistant",
+        timeout: int = PROBE_TIMEOUT,
+        concurrent: bool = True,
+    ) -> dict[str, bool | None]:
+        """Detect server capabilities within one overall ``timeout``.
+
+        With ``concurrent`` the health and state API checks run side by side,
+        as the config flows want. Otherwise the state API test key is only
+        written when the health endpoint is missing, which keeps routine
+        setups down to one GET. Raises when the server cannot be reached; a
+        missing health endpoint is only fatal together with a missing state
+        API, which is reported as ``state_api: False``.
+        """
+
+        try:
+            async with asyncio.timeout(timeout):
+                health_result, state_result = await self._probe_checks(
+                    source=source, timeout=timeout, concurrent=concurrent
+                )
+        except TimeoutError as err:
+            raise HomeAssistantError(
+                f"Dashino probe timed out after {timeout}s: {self.base_url}"
+            ) from err
+
+        health_ok = not isinstance(health_result, BaseException)
+        if not health_ok and not (
+            isinstance(health_result, DashinoRequestError) and health_result.status == 404
+        ):
+            raise health_result
+
+        state_api: bool | None = True
+        if isinstance(state_result, DashinoRequestError) and state_result.status == 404:
+            state_api = False
+        elif isinstance(state_result, BaseException):
+            if not health_ok:
+                raise state_result
+            state_api = None
+        elif health_ok and not concurrent:
+            state_api = None
+
+        return {
+            CAPABILITY_HEALTH: health_ok,
+            CAPABILITY_STATE_API: state_api,
+            CAPABILITY_NDJSON_WEBHOOKS: health_ok and _advertises_ndjson(health_result),
+        }
+
+    async def _probe_checks(
+        self, *, source: str, timeout: int, concurrent: bool
+    ) -> tuple[Any, Any]:
+        if concurrent:
+            return await asyncio.gather(
+                self.check_health(timeout=timeout),
+                self.check_state_api(source=source, timeout=timeout),
+                return_exceptions=True,
+            )
+
+        health_result: Any
+        state_result: Any = None
+        try:
+            health_result = await self.check_health(timeout=timeout)
+        except HomeAssistantError as err:
+            health_result = err
+        if isinstance(health_result, DashinoRequestError) and health_result.status == 404:
+            try:
+                await self.check_state_api(source=source, timeout=timeout)
+            except HomeAssistantError as err:
+                state_result = err
+        return health_result, state_result
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        json: Any | None = None,
+        *,
+        data: bytes | None = None,
+        content_type: str = "application/json",
+        timeout: int | None = None,
+    ) -> Any:
+        if json is not None:
+            data = _encode(json)
+        await self._ready.wait()
+        # Resolve target, auth and timeout only once any base URL switch has settled.
+        url = f"{self.base_url}{path}"
+        client_timeout = ClientTimeout(total=timeout or self.timeout)
+        self._inflight += 1
+        self._idle.clear()
         try:
             async with self.session.request(
-                method, url, json=json, headers=self._headers(), timeout=timeout
+                method,
+                url,
+                data=data,
+                headers=self._headers(content_type),
+                timeout=client_timeout,
             ) as resp:
                 if 200 <= resp.status < 300:
+                    self.last_error = None
                     if resp.content_type == "application/json":
                         return await resp.json()
                     await resp.read()
-                    self.last_error = None
                     return None
 
                 body = await resp.text()
@@ -125,3 +397,65 @@ class DashinoClient:
         except Exception as err:  # noqa: BLE001
             _LOGGER.exception("Dashino request error to %s: %s", url, err)
             raise HomeAssistantError(f"Dashino request error: {err}") from err
+        finally:
+            self._inflight -= 1
+            if not self._inflight:
+                self._idle.set()
+
+
+async def async_get_capabilities(
+    hass: HomeAssistant,
+    client: DashinoClient,
+    *,
+    source: str | None = None,
+    concurrent: bool = True,
+) -> dict[str, bool | None]:
+    """Return server capabilities, probing only when none are cached.
+
+    Successful probes are cached in memory per base URL and credentials, so
+    setup after a config/options flow (and reloads) reuse the flow's result.
+    The cached dict is shared with the client.
+    """
+
+    cache: dict[tuple[Any, ...], dict[str, bool | None]] = hass.data.setdefault(
+        DATA_CAPABILITIES, {}
+    )
+    cache_key = (client.base_url, client.secret_header, client.secret, client.api_token)
+    if (capabilities := cache.get(cache_key)) is None:
+        capabilities = await client.probe(
+            source=source or client.default_source, concurrent=concurrent
+        )
+        if capabilities[CAPABILITY_HEALTH] or capabilities[CAPABILITY_STATE_API] is not False:
+            cache[cache_key] = capabilities
+    client.capabilities = capabilities
+    return capabilities
+
+
+def _advertises_ndjson(health: Any) -> bool:
+    """Return True when the health body lists NDJSON webhook batches as a feature."""
+
+    if not isinstance(health, dict):
+        return False
+    features = health.get("features")
+    return isinstance(features, list) and NDJSON_FEATURE in features
+
+
+def _encode(payload: Any) -> bytes:
+    """Serialize a request body with Home Assistant's encoder, used for every path."""
+
+    try:
+        return json_dumps(payload).encode()
+    except (TypeError, ValueError) as err:
+        raise HomeAssistantError(f"Dashino payload is not JSON serializable: {err}") from err
+
+
+def _resolve(
+    batch: list[tuple[bytes, asyncio.Future[None]]], err: Exception | None = None
+) -> None:
+    for _, future in batch:
+        if future.done():
+            continue
+        if err is None:
+            future.set_result(None)
+        else:
+            future.set_exception(err)
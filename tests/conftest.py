@@ -0,0 +1,10 @@
+"""Shared fixtures for Dashino tests."""
+
+from __future__ import annotations
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations: None) -> None:
+    """Load custom_components/dashino in every test."""
@@ -0,0 +1 @@
+"""Long-running soak tests for the Dashino integration."""
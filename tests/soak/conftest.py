@@ -0,0 +1,97 @@
+"""Stand-in Dashino server for soak tests."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import AsyncGenerator
+import json
+from typing import Any
+
+from aiohttp import web
+import pytest
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+
+class StandInDashino:
+    """Minimal Dashino server: health, state API and webhooks.
+
+    While ``outage`` is set, every request is answered with 503 and its
+    connection closed, so the client sees failures and must reconnect later.
+    """
+
+    def __init__(self) -> None:
+        self.states: dict[str, dict[str, Any]] = {}
+        self.webhooks: dict[str, list[Any]] = defaultdict(list)
+        self.outage = False
+        self.open_requests = 0
+        self.dropped = 0
+        self.url = ""
+        self._runner: web.AppRunner | None = None
+
+    async def start(self) -> None:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/api/health", self._health)
+        app.router.add_post("/api/states/{key}/value", self._set_state)
+        app.router.add_delete("/api/states/{key}/value", self._clear_state)
+        app.router.add_post("/api/webhooks/{source}", self._webhook)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+        self.url = f"http://127.0.0.1:{port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler: Any) -> web.StreamResponse:
+        if self.outage:
+            self.dropped += 1
+            return web.Response(status=503, headers={"Connection": "close"})
+        self.open_requests += 1
+        try:
+            return await handler(request)
+        finally:
+            self.open_requests -= 1
+
+    async def _health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok", "features": ["webhooks-ndjson"]})
+
+    async def _set_state(self, request: web.Request) -> web.Response:
+        key = request.match_info["key"]
+        body = await request.json()
+        data = body.get("data")
+        if body.get("merge", True) and isinstance(data, dict):
+            self.states.setdefault(key, {}).update(data)
+        else:
+            self.states[key] = data
+        return web.json_response({"key": key, "data": self.states[key]})
+
+    async def _clear_state(self, request: web.Request) -> web.Response:
+        if self.states.pop(request.match_info["key"], None) is None:
+            raise web.HTTPNotFound
+        return web.Response(status=204)
+
+    async def _webhook(self, request: web.Request) -> web.Response:
+        source = request.match_info["source"]
+        if request.content_type == NDJSON_CONTENT_TYPE:
+            text = await request.text()
+            events = [json.loads(line) for line in text.splitlines() if line]
+        else:
+            events = [await request.json()]
+        self.webhooks[source].extend(events)
+        return web.Response(status=204)
+
+
+@pytest.fixture
+async def dashino_server(socket_enabled: None) -> AsyncGenerator[StandInDashino, None]:
+    """Run a stand-in Dashino server on localhost."""
+
+    server = StandInDashino()
+    await server.start()
+    yield server
+    await server.stop()
@@ -0,0 +1,331 @@
+"""Soak test: hours of simulated traffic with outages, churn and reloads.
+
+Scale is controlled with environment variables, e.g. for a long run::
+
+    DASHINO_SOAK_HOURS=24 DASHINO_SOAK_ENTITIES=10000 pytest tests/soak
+
+Each cycle stands for one simulated minute of traffic. Memory is measured with
+tracemalloc, counting only allocations made from the integration's own code,
+and must plateau once the run is warm.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from datetime import timedelta
+import gc
+import os
+import random
+import tracemalloc
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import area_registry as ar, entity_registry as er
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+import homeassistant.util.dt as dt_util
+
+from custom_components.dashino.const import (
+    CONF_API_TOKEN,
+    CONF_BASE_URL,
+    CONF_DEFAULT_SOURCE,
+    CONF_DEFAULT_STATE_KEY,
+    CONF_DEFAULT_TYPE,
+    CONF_DEFAULT_WIDGET_ID,
+    CONF_SECRET,
+    CONF_SECRET_HEADER,
+    DOMAIN,
+    GROUP_RETRY_MAX_DELAY,
+)
+
+from .conftest import StandInDashino
+
+SOAK_HOURS = float(os.environ.get("DASHINO_SOAK_HOURS", "2"))
+SOAK_ENTITIES = int(os.environ.get("DASHINO_SOAK_ENTITIES", "2000"))
+CHANGES_PER_MINUTE = max(1, SOAK_ENTITIES // 10)
+FORWARDS_PER_MINUTE = int(os.environ.get("X_FWD", "20"))
+AREA_LIGHTS = 50
+
+OUTAGE_EVERY = int(os.environ.get("X_OUT", "15"))
+OUTAGE_LENGTH = 3
+RELOAD_EVERY = int(os.environ.get("X_REL", "30"))
+CHURN_EVERY = int(os.environ.get("X_CHURN", "5"))
+CHURN_GROUPS = 4
+
+PLATEAU_SLACK = 256 * 1024
+TASK_SLACK = 5
+
+_OWN_CODE = tracemalloc.Filter(
+    True, os.path.join("*", "custom_components", "dashino", "*"), all_frames=True
+)
+
+
+def _entry_data(url: str) -> dict[str, str]:
+    return {
+        CONF_BASE_URL: url,
+        CONF_DEFAULT_SOURCE: "soak",
+        CONF_DEFAULT_STATE_KEY: "",
+        CONF_API_TOKEN: "",
+        CONF_SECRET: "",
+        CONF_SECRET_HEADER: "X-Dashino-Secret",
+        CONF_DEFAULT_WIDGET_ID: "",
+        CONF_DEFAULT_TYPE: "",
+    }
+
+
+def _dashino_tasks() -> list[asyncio.Task]:
+    current = asyncio.current_task()
+    return [
+        task
+        for task in asyncio.all_tasks()
+        if task is not current and task.get_name().startswith("dashino") and not task.done()
+    ]
+
+
+async def _drain(hass: HomeAssistant) -> None:
+    await hass.async_block_till_done()
+    while tasks := _dashino_tasks():
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await hass.async_block_till_done()
+
+
+async def _settle(hass: HomeAssistant, seconds: float = 60) -> None:
+    """Advance time so pending group flushes fire, then wait for their pushes.
+
+    Firing time runs every due loop timer, including aiohttp's request
+    timeouts, so in-flight work is drained first.
+    """
+
+    await _drain(hass)
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=seconds))
+    await _drain(hass)
+
+
+SNAPS = []
+def _own_memory() -> int:
+    from homeassistant.helpers import storage
+    print("WRITES", storage.Store._async_write_data.call_count, flush=True)
+    storage.Store._async_write_data.reset_mock()
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot().filter_traces([_OWN_CODE])
+    SNAPS.append(snapshot)
+    from collections import Counter
+    cnt=Counter(); seen=set(); ex={}
+    def note(o):
+        if id(o) in seen: return
+        seen.add(id(o))
+        tb=tracemalloc.get_object_traceback(o)
+        if tb is None: return
+        fr=[f for f in tb if "custom_components/dashino" in f.filename]
+        if not fr: return
+        k=(type(o).__name__, fr[0].filename.rsplit("/",1)[1], fr[0].lineno, tb[0].filename.rsplit("/",1)[1], tb[0].lineno)
+        cnt[k]+=1; ex[k]=o
+    objs_all=gc.get_objects()
+    for o in objs_all:
+        note(o)
+        for r in gc.get_referents(o): note(r)
+    global PREV
+    prev=globals().get("PREV") or Counter()
+    d=Counter(cnt); d.subtract(prev)
+    print("OBJDIFF", [(k,v) for k,v in d.most_common(8)], flush=True)
+    for k,v in d.most_common(4):
+        o=ex[k]; print("   EX", k, repr(o)[:150], [type(r).__name__ for r in gc.get_referrers(o)][:5], flush=True)
+    PREV=cnt
+    import aiohttp.payload as ap
+    objs=[o for o in gc.get_objects() if isinstance(o, ap.BytesPayload)]
+    print("PAYLOADS", len(objs))
+    from collections import Counter
+    excs=[o for o in gc.get_objects() if isinstance(o, BaseException)]
+    print("EXC", Counter(type(e).__name__ for e in excs).most_common(5))
+    if excs:
+        e=[x for x in excs if type(x).__name__=="HomeAssistantError"][:1] or excs[:1]
+        for r in gc.get_referrers(e[0]):
+            print("  REF", type(r).__name__, str(r)[:200] if not isinstance(r,(list,dict)) else (len(r), str(r)[:200]))
+            if isinstance(r, list):
+                for rr in gc.get_referrers(r): print("     RR", type(rr).__name__, str(rr)[:200])
+    from homeassistant.helpers import storage
+    m=storage.Store._async_write_data
+    print("WRITES", getattr(m,"call_count",None))
+    if objs:
+        o=objs[0]
+        chain=[o]
+        for depth in range(6):
+            refs=[r for r in gc.get_referrers(chain[-1]) if r is not objs and r is not chain and not isinstance(r, type(sys._getframe()))]
+            print("  depth", depth, [type(r).__name__ + (":"+str(getattr(r,'__qualname__',''))[:40]) for r in refs][:6])
+            if not refs: break
+            chain.append(refs[0])
+    if len(SNAPS) >= 99:
+        for st in SNAPS[-1].compare_to(SNAPS[1], "traceback")[:10]:
+            print("DIFF", st.size_diff, st.count_diff)
+            for line in st.traceback.format()[-10:]:
+                print("   ", line)
+    return sum(trace.size for trace in snapshot.traces)
+
+
+async def test_soak_memory_plateaus_without_leaks(
+    hass: HomeAssistant, dashino_server: StandInDashino
+) -> None:
+    """Drive state, webhook and registry traffic and check nothing accumulates."""
+
+    rng = random.Random(1234)
+    session = async_get_clientsession(hass)
+    listeners_before = hass.bus.async_listeners().get(EVENT_STATE_CHANGED, 0)
+
+    sensors = [f"sensor.soak_{i}_temperature" for i in range(SOAK_ENTITIES)]
+    for entity_id in sensors:
+        hass.states.async_set(entity_id, "20.0")
+
+    area_reg = ar.async_get(hass)
+    ent_reg = er.async_get(hass)
+    areas = [area_reg.async_create(f"Soak room {i}").id for i in range(2)]
+    lights = []
+    for i in range(AREA_LIGHTS):
+        entry = ent_reg.async_get_or_create("light", "soak", f"light_{i}")
+        ent_reg.async_update_entity(entry.entity_id, area_id=areas[i % 2])
+        hass.states.async_set(entry.entity_id, "off", {"brightness": 0})
+        lights.append(entry.entity_id)
+
+    entry = MockConfigEntry(
+        domain=DOMAIN, version=2, data=_entry_data(dashino_server.url), title="Dashino"
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    await hass.services.async_call(
+        DOMAIN,
+        "bind_group",
+        {"key": "temperatures", "match": "sensor.*_temperature"},
+        blocking=True,
+    )
+    await hass.services.async_call(
+        DOMAIN,
+        "bind_group",
+        {"key": "room_lights", "domain": "light", "area": areas[0], "attribute": "brightness"},
+        blocking=True,
+    )
+
+    minutes = int(SOAK_HOURS * 60)
+    churn_keys: list[str] = []
+    churn_entities: list[str] = []
+    forwarded: dict[str, list[int]] = {"cam": [], "motion": []}
+    sequence = 0
+    tasks_after_reload: int | None = None
+    checkpoints: list[int] = []
+
+    tracemalloc.start(10)
+    try:
+        for minute in range(1, minutes + 1):
+            dashino_server.outage = minute % OUTAGE_EVERY < OUTAGE_LENGTH and minute > 1
+
+            for entity_id in rng.sample(sensors, CHANGES_PER_MINUTE):
+                hass.states.async_set(entity_id, f"{rng.uniform(15, 25):.1f}")
+            for entity_id in rng.sample(lights, 5):
+                hass.states.async_set(entity_id, "on", {"brightness": rng.randint(0, 255)})
+
+            # Entity churn: short-lived sensors join and leave the glob group.
+            churn_id = f"sensor.churn_{minute}_temperature"
+            hass.states.async_set(churn_id, "1")
+            churn_entities.append(churn_id)
+            if len(churn_entities) > 10:
+                hass.states.async_remove(churn_entities.pop(0))
+
+            # Registry churn: move a light between areas.
+            moved = rng.choice(lights)
+            ent_reg.async_update_entity(moved, area_id=rng.choice(areas))
+
+            # Key churn: bind a fresh group and drop the oldest.
+            if minute % CHURN_EVERY == 0:
+                key = f"churn_{minute}"
+                await hass.services.async_call(
+                    DOMAIN, "bind_group", {"key": key, "domain": "light"}, blocking=True
+                )
+                churn_keys.append(key)
+                if len(churn_keys) > CHURN_GROUPS:
+                    await hass.services.async_call(
+                        DOMAIN, "unbind_group", {"key": churn_keys.pop(0)}, blocking=True
+                    )
+
+            calls = []
+            for _ in range(FORWARDS_PER_MINUTE):
+                source = rng.choice(list(forwarded))
+                sequence += 1
+                calls.append(
+                    hass.services.async_call(
+                        DOMAIN,
+                        "forward",
+                        {"source": source, "data": {"seq": sequence}},
+                        blocking=True,
+                    )
+                )
+            results = await asyncio.gather(*calls, return_exceptions=True)
+            assert all(
+                result is None or isinstance(result, HomeAssistantError) for result in results
+            )
+
+            import time; t0=time.monotonic()
+            await _settle(hass)
+            print("m", minute, "settle", round(time.monotonic()-t0,2), "outage", dashino_server.outage, flush=True)
+
+            if minute % RELOAD_EVERY == 0 and not dashino_server.outage:
+                assert await hass.config_entries.async_reload(entry.entry_id)
+                await hass.async_block_till_done()
+                assert entry.state is ConfigEntryState.LOADED
+                await _settle(hass)
+                assert not _dashino_tasks()
+                tasks = len(asyncio.all_tasks())
+                if tasks_after_reload is None:
+                    tasks_after_reload = tasks
+                assert tasks <= tasks_after_reload + TASK_SLACK
+
+            if minute % (minutes // 8) == 0:
+                t0=time.monotonic(); checkpoints.append(_own_memory()); print("snap", round(time.monotonic()-t0,2), checkpoints, flush=True)
+
+        dashino_server.outage = False
+        # Let any backed-off group retries run, then check the server caught up.
+        t0=time.monotonic()
+        await _settle(hass, GROUP_RETRY_MAX_DELAY + 1)
+        await _settle(hass, GROUP_RETRY_MAX_DELAY + 1)
+        print("final", round(time.monotonic()-t0,2), flush=True)
+    finally:
+        tracemalloc.stop()
+
+    # Memory from the integration's own code plateaus after the first quarter.
+    assert len(checkpoints) >= 3
+    warm = checkpoints[1]
+    assert max(checkpoints[2:]) - warm < PLATEAU_SLACK, checkpoints
+
+    # Group snapshots on the server match Home Assistant after outages.
+    expected_temperatures = {
+        state.entity_id: state.state
+        for state in hass.states.async_all("sensor")
+        if state.entity_id.endswith("_temperature")
+    }
+    assert dashino_server.states["temperatures"] == expected_temperatures
+    expected_lights = {
+        entity_id: hass.states.get(entity_id).attributes.get("brightness")
+        for entity_id in lights
+        if ent_reg.async_get(entity_id).area_id == areas[0]
+    }
+    assert dashino_server.states["room_lights"] == expected_lights
+
+    # Webhook events are delivered in order per source.
+    for events in dashino_server.webhooks.values():
+        seqs = [event["data"]["seq"] for event in events]
+        assert seqs == sorted(seqs)
+    assert dashino_server.dropped > 0
+
+    # Unload leaves no tasks, listeners or checked-out connections behind.
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert not _dashino_tasks()
+    assert hass.bus.async_listeners().get(EVENT_STATE_CHANGED, 0) == listeners_before
+    assert not session.connector._acquired  # type: ignore[union-attr]
+    assert dashino_server.open_requests == 0